@@ -1,17 +1,44 @@
 import sqlite3
+import re
+import bisect
+import itertools
+import heapq
 import requests
-import diskcache
+import cachetools
+import orjson
+import mmap
+import math
+import array
+import operator
+import hashlib
+import os
 import telebot
 import threading
 import time
+import logging
 
 from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
 from telebot.types import ReplyKeyboardMarkup, KeyboardButton
 from html import escape
 from config import API_TOKEN
 import collections
+import concurrent.futures
 from time import gmtime, strftime
+logger = logging.getLogger(__name__)
 DB_PATH = "watch.db"
+SUFFIX_MAX_LEN = 32
+FIND_CACHE_SIZE = 1024
+FIND_RESULTS_LIMIT = 50
+SKINS_KEYBOARD_LIMIT = 20
+SKINS_CACHE_PATH = "skins.orjson"
+SKINS_HISTORY_CACHE_PATH = "skins_history.orjson"
+CACHE_TTL = 300
+NAN = float("nan")
+WATCH_CONDITIONS = {"<": operator.le, ">": operator.ge}
+SESSION_CACHE_SIZE = 10_000
+SESSION_TTL = 600
+_INTERVAL_RE = re.compile(r"(\d+)\s*(minute|min|hour|day)s?")
+BOT_THREADS = 8
 
 # ---------- SQLQ ----------
 class SQLQ:
@@ -36,6 +63,8 @@ class SQLQ:
     UPDATE_WATCH = "UPDATE user_watch SET target_price = ?, condition = ? WHERE id = ?"
     SELECT_USER_WATCHES = "SELECT * FROM user_watch WHERE chat_id = ?"
     SELECT_WATCH = "SELECT * FROM user_watch WHERE id = ? AND chat_id = ?"
+    SELECT_ALL_WATCHES = "SELECT * FROM user_watch"
+    CREATE_WATCH_CHAT_INDEX = "CREATE INDEX IF NOT EXISTS ix_user_watch_chat ON user_watch(chat_id)"
 
     CREATE_REMINDER_TABLE = """
         CREATE TABLE IF NOT EXISTS user_reminder (
@@ -53,7 +82,18 @@ class SQLQ:
     DELETE_REMINDER = "DELETE FROM user_reminder WHERE id = ?"
     SELECT_USER_REMINDERS = "SELECT * FROM user_reminder WHERE chat_id = ?"
     SELECT_ALL_REMINDERS = "SELECT * FROM user_reminder"
+    SELECT_REMINDER = "SELECT * FROM user_reminder WHERE id = ? AND chat_id = ?"
     UPDATE_REMINDER = "UPDATE user_reminder SET interval_minutes = ? WHERE id = ?"
+    CREATE_REMINDER_CHAT_INDEX = "CREATE INDEX IF NOT EXISTS ix_user_reminder_chat ON user_reminder(chat_id)"
+
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA busy_timeout=5000",
+        "PRAGMA cache_size=-20000",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA mmap_size=268435456",
+    )
 # ---------- Dbase ----------
 class Dbase:
     """
@@ -68,15 +108,28 @@ class Dbase:
         """
         self.conn = sqlite3.connect(db_path, check_same_thread=False)
         self.cur = self.conn.cursor()
+        self.lock = threading.RLock()
+        self.apply_pragmas()
         self.create_table()
 
+    def apply_pragmas(self):
+        """
+        Switch the connection to WAL and tune it for many short transactions.
+        """
+        with self.lock:
+            for pragma in SQLQ.PRAGMAS:
+                self.cur.execute(pragma)
+
     def create_table(self):
         """
-        Create the user_watch table if it does not exist.
+        Create the user_watch and user_reminder tables and their indexes if they do not exist.
         """
-        self.cur.execute(SQLQ.CREATE_TABLE)
-        self.cur.execute(SQLQ.CREATE_REMINDER_TABLE)
-        self.conn.commit()
+        with self.lock:
+            self.cur.execute(SQLQ.CREATE_TABLE)
+            self.cur.execute(SQLQ.CREATE_REMINDER_TABLE)
+            self.cur.execute(SQLQ.CREATE_WATCH_CHAT_INDEX)
+            self.cur.execute(SQLQ.CREATE_REMINDER_CHAT_INDEX)
+            self.conn.commit()
 
     def close(self):
         """
@@ -86,16 +139,15 @@ class Dbase:
 
 
 
-# ---------- Insert, Update, Select, Delete ----------
-class UpdateReminder(Dbase):
-    def update_reminder(self, reminder_id, new_interval):
-        self.cur.execute(SQLQ.UPDATE_REMINDER, (new_interval, reminder_id))
-        self.conn.commit()
-
-class Insert(Dbase):
+# ---------- Db ----------
+class Db(Dbase):
     """
-    Class for inserting data into the database.
+    Single database access object for watches and reminders.
+    All methods share one connection and cursor guarded by ``self.lock``.
     """
+    WATCH_COLUMNS = ["id", "chat_id", "skin_market_hash_name", "skin_item_page", "target_price", "condition"]
+    REMINDER_COLUMNS = ["id", "chat_id", "skin_market_hash_name", "skin_item_page", "interval_minutes"]
+
     def add_watch(self, chat_id, skin_market_hash_name, skin_item_page, target_price, condition):
         """
         Insert a new watch record into the database.
@@ -110,14 +162,21 @@ class Insert(Dbase):
         Returns:
             int: The ID of the inserted watch.
         """
-        self.cur.execute(SQLQ.INSERT_WATCH, (chat_id, skin_market_hash_name, skin_item_page, target_price, condition))
-        self.conn.commit()
-        return self.cur.lastrowid
+        with self.lock:
+            self.cur.execute(SQLQ.INSERT_WATCH, (chat_id, skin_market_hash_name, skin_item_page, target_price, condition))
+            self.conn.commit()
+            return self.cur.lastrowid
+
+    def add_watches_many(self, rows):
+        """
+        Insert many watch records in a single transaction.
+
+        Args:
+            rows (iterable): Tuples (chat_id, skin_market_hash_name, skin_item_page, target_price, condition).
+        """
+        with self.lock, self.conn:
+            self.cur.executemany(SQLQ.INSERT_WATCH, rows)
 
-class Update(Dbase):
-    """
-    Class for updating data in the database.
-    """
     def update_watch(self, watch_id, target_price, condition):
         """
         Update the target price and condition for a watch.
@@ -127,13 +186,10 @@ class Update(Dbase):
             target_price (float): New target price.
             condition (str): '<' or '>'.
         """
-        self.cur.execute(SQLQ.UPDATE_WATCH, (target_price, condition, watch_id))
-        self.conn.commit()
+        with self.lock:
+            self.cur.execute(SQLQ.UPDATE_WATCH, (target_price, condition, watch_id))
+            self.conn.commit()
 
-class Select(Dbase):
-    """
-    Class for selecting data from the database.
-    """
     def get_user_watches(self, chat_id):
         """
         Get all watches for a user.
@@ -144,9 +200,10 @@ class Select(Dbase):
         Returns:
             list: List of watch dicts.
         """
-        self.cur.execute(SQLQ.SELECT_USER_WATCHES, (chat_id,))
-        columns = ["id", "chat_id", "skin_market_hash_name", "skin_item_page", "target_price", "condition"]
-        return [dict(zip(columns, row)) for row in self.cur.fetchall()]
+        with self.lock:
+            self.cur.execute(SQLQ.SELECT_USER_WATCHES, (chat_id,))
+            rows = self.cur.fetchall()
+        return [dict(zip(self.WATCH_COLUMNS, row)) for row in rows]
 
     def get_watch(self, watch_id, chat_id):
         """
@@ -159,17 +216,25 @@ class Select(Dbase):
         Returns:
             dict or None: Watch dict or None if not found.
         """
-        self.cur.execute(SQLQ.SELECT_WATCH, (watch_id, chat_id))
-        row = self.cur.fetchone()
+        with self.lock:
+            self.cur.execute(SQLQ.SELECT_WATCH, (watch_id, chat_id))
+            row = self.cur.fetchone()
         if not row:
             return None
-        columns = ["id", "chat_id", "skin_market_hash_name", "skin_item_page", "target_price", "condition"]
-        return dict(zip(columns, row))
+        return dict(zip(self.WATCH_COLUMNS, row))
+
+    def get_all_watches(self):
+        """
+        Get all watches of all users.
+
+        Returns:
+            list: List of watch dicts.
+        """
+        with self.lock:
+            self.cur.execute(SQLQ.SELECT_ALL_WATCHES)
+            rows = self.cur.fetchall()
+        return [dict(zip(self.WATCH_COLUMNS, row)) for row in rows]
 
-class Delete(Dbase):
-    """
-    Class for deleting data from the database.
-    """
     def delete_watch(self, watch_id):
         """
         Delete a watch by ID.
@@ -177,30 +242,262 @@ class Delete(Dbase):
         Args:
             watch_id (int): Watch ID.
         """
-        self.cur.execute(SQLQ.DELETE_WATCH, (watch_id,))
-        self.conn.commit()
+        with self.lock:
+            self.cur.execute(SQLQ.DELETE_WATCH, (watch_id,))
+            self.conn.commit()
 
-class InsertReminder(Dbase):
     def add_reminder(self, chat_id, skin_market_hash_name, skin_item_page, interval_minutes):
-        self.cur.execute(SQLQ.INSERT_REMINDER, (chat_id, skin_market_hash_name, skin_item_page, interval_minutes))
-        self.conn.commit()
-        return self.cur.lastrowid
+        with self.lock:
+            self.cur.execute(SQLQ.INSERT_REMINDER, (chat_id, skin_market_hash_name, skin_item_page, interval_minutes))
+            self.conn.commit()
+            return self.cur.lastrowid
+
+    def add_reminders_many(self, rows):
+        """
+        Insert many reminder records in a single transaction.
+
+        Args:
+            rows (iterable): Tuples (chat_id, skin_market_hash_name, skin_item_page, interval_minutes).
+        """
+        with self.lock, self.conn:
+            self.cur.executemany(SQLQ.INSERT_REMINDER, rows)
 
-class SelectReminder(Dbase):
     def get_user_reminders(self, chat_id):
-        self.cur.execute(SQLQ.SELECT_USER_REMINDERS, (chat_id,))
-        columns = ["id", "chat_id", "skin_market_hash_name", "skin_item_page", "interval_minutes"]
-        return [dict(zip(columns, row)) for row in self.cur.fetchall()]
+        with self.lock:
+            self.cur.execute(SQLQ.SELECT_USER_REMINDERS, (chat_id,))
+            rows = self.cur.fetchall()
+        return [dict(zip(self.REMINDER_COLUMNS, row)) for row in rows]
+
+    def get_reminder_by_id(self, reminder_id, chat_id):
+        with self.lock:
+            self.cur.execute(SQLQ.SELECT_REMINDER, (reminder_id, chat_id))
+            row = self.cur.fetchone()
+        if not row:
+            return None
+        return dict(zip(self.REMINDER_COLUMNS, row))
 
     def get_all_reminders(self):
-        self.cur.execute(SQLQ.SELECT_ALL_REMINDERS)
-        columns = ["id", "chat_id", "skin_market_hash_name", "skin_item_page", "interval_minutes"]
-        return [dict(zip(columns, row)) for row in self.cur.fetchall()]
+        with self.lock:
+            self.cur.execute(SQLQ.SELECT_ALL_REMINDERS)
+            rows = self.cur.fetchall()
+        return [dict(zip(self.REMINDER_COLUMNS, row)) for row in rows]
 
-class DeleteReminder(Dbase):
     def delete_reminder(self, reminder_id):
-        self.cur.execute(SQLQ.DELETE_REMINDER, (reminder_id,))
-        self.conn.commit()
+        with self.lock:
+            self.cur.execute(SQLQ.DELETE_REMINDER, (reminder_id,))
+            self.conn.commit()
+
+    def update_reminder_if_owned(self, reminder_id, chat_id, new_interval):
+        """
+        Change the interval of a user's reminder in a single transaction.
+
+        Args:
+            reminder_id (int): Reminder ID.
+            chat_id (int): Telegram chat ID of the owner.
+            new_interval (int): New interval in minutes.
+
+        Returns:
+            dict or None: Updated reminder dict or None if not found.
+        """
+        with self.lock:
+            try:
+                self.cur.execute("BEGIN IMMEDIATE")
+                self.cur.execute(SQLQ.SELECT_REMINDER, (reminder_id, chat_id))
+                row = self.cur.fetchone()
+                if row:
+                    self.cur.execute(SQLQ.UPDATE_REMINDER, (new_interval, reminder_id))
+                self.conn.commit()
+            except sqlite3.Error:
+                self.conn.rollback()
+                raise
+        if not row:
+            return None
+        reminder = dict(zip(self.REMINDER_COLUMNS, row))
+        reminder["interval_minutes"] = new_interval
+        return reminder
+
+# ---------- Cache ----------
+def _read_cache(path, max_age):
+    """
+    Read a JSON cache file if it is younger than max_age.
+
+    Args:
+        path (str): Cache file path.
+        max_age (int): Maximum age in seconds.
+
+    Returns:
+        object or None: Cached data or None if missing, expired or unreadable.
+    """
+    try:
+        if time.time() - os.path.getmtime(path) >= max_age:
+            return None
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                return orjson.loads(view)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(path, obj):
+    """
+    Atomically write data to a JSON cache file.
+
+    Args:
+        path (str): Cache file path.
+        obj (object): JSON-serializable data.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(orjson.dumps(obj))
+    os.replace(tmp_path, path)
+
+
+def _cache_mtime(path):
+    """
+    Get the modification time of a cache file.
+
+    Args:
+        path (str): Cache file path.
+
+    Returns:
+        float or None: Modification time or None if the file does not exist.
+    """
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def _touch_cache(path):
+    """
+    Mark a cache file as fresh without rewriting it.
+
+    Args:
+        path (str): Cache file path.
+    """
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+# ---------- SkinIndex ----------
+class SkinIndex:
+    """
+    Immutable snapshot of the skins list stored as parallel arrays indexed by position.
+    A refresh builds a new snapshot and publishes it with one assignment, so readers
+    must take ``skins.index`` once per operation and use only that object.
+    """
+    def __init__(self, skins, previous=None):
+        """
+        Build all arrays and the substring index for the given skins list.
+
+        Args:
+            skins (list): List of skin dicts.
+            previous (SkinIndex, optional): Current snapshot, its name-derived structures
+                are reused when the names did not change.
+        """
+        names = [s["market_hash_name"] for s in skins]
+        if previous is not None and previous.names == names:
+            # Usually only prices move between refreshes, the shared structures are never mutated
+            self.names = previous.names
+            self.names_lower = previous.names_lower
+            self.names_escaped = previous.names_escaped
+            self.by_name = previous.by_name
+            self.suffixes = previous.suffixes
+            self.suffix_idx = previous.suffix_idx
+            # Search results depend on names only, so they stay valid for this snapshot too
+            self._find_cache = previous._find_cache
+            self._find_lock = previous._find_lock
+        else:
+            self.names = names
+            self.names_lower = [name.lower() for name in names]
+            self.names_escaped = [escape(name) for name in names]
+            self.by_name = {name: idx for idx, name in enumerate(names)}
+            # Sorted suffixes of every lowercased name, so any substring query is a prefix range found by bisect
+            suffixes = sorted(
+                (name[i:i + SUFFIX_MAX_LEN], idx)
+                for idx, name in enumerate(self.names_lower)
+                for i in range(len(name))
+            )
+            self.suffixes = [suffix for suffix, _ in suffixes]
+            self.suffix_idx = [idx for _, idx in suffixes]
+            # Search results belong to these names only, a new name list starts with an empty cache
+            self._find_cache = collections.OrderedDict()
+            self._find_lock = threading.Lock()
+        self.urls = [s["item_page"] for s in skins]
+        self.prices = array.array("d", (NAN if s.get("min_price") is None else s["min_price"] for s in skins))
+
+    def skin(self, idx):
+        """
+        Assemble the skin dict stored at the given index.
+
+        Args:
+            idx (int): Skin index.
+
+        Returns:
+            dict: Skin dict.
+        """
+        return {"market_hash_name": self.names[idx], "item_page": self.urls[idx], "min_price": self.price_at(idx)}
+
+    def price_at(self, idx):
+        """
+        Get the current minimal price of the skin at the given index.
+
+        Args:
+            idx (int): Skin index.
+
+        Returns:
+            float or None: Price or None if the skin has no listing.
+        """
+        price = self.prices[idx]
+        return None if math.isnan(price) else price
+
+    def find_indices(self, query):
+        """
+        Find indices of skins by name substring, memoizing recent queries.
+        Only the first FIND_RESULTS_LIMIT indices are kept, so broad queries stay small in the cache.
+
+        Args:
+            query (str): Substring to search for in skin names.
+
+        Returns:
+            tuple: First FIND_RESULTS_LIMIT matching skin indices and the total number of matches.
+        """
+        q = query.lower()
+        with self._find_lock:
+            result = self._find_cache.get(q)
+            if result is not None:
+                self._find_cache.move_to_end(q)
+                return result
+        idxs = self.search(q)
+        result = (idxs[:FIND_RESULTS_LIMIT], len(idxs))
+        with self._find_lock:
+            self._find_cache[q] = result
+            if len(self._find_cache) > FIND_CACHE_SIZE:
+                self._find_cache.popitem(last=False)
+        return result
+
+    def search(self, q):
+        """
+        Look up a lowercased substring in the suffix index.
+
+        Args:
+            q (str): Lowercased substring.
+
+        Returns:
+            list: List of matching skin indices.
+        """
+        if not q:
+            return list(range(len(self.names)))
+        prefix = q[:SUFFIX_MAX_LEN]
+        lo = bisect.bisect_left(self.suffixes, prefix)
+        hi = bisect.bisect_left(self.suffixes, prefix + "\U0010ffff", lo)
+        idxs = sorted(set(self.suffix_idx[lo:hi]))
+        if len(q) > SUFFIX_MAX_LEN:
+            # Suffixes are truncated, confirm the full query for long inputs
+            return [i for i in idxs if q in self.names_lower[i]]
+        return idxs
+
 # ---------- Skins ----------
 class Skins:
     """
@@ -210,86 +507,248 @@ class Skins:
         """
         Initialize the Skins class and load skins from cache or API.
         """
-        self.cache = diskcache.Cache("skinport_cache")
-        self.cache_history = diskcache.Cache("skins_history_data")
+        self.cache_path = SKINS_CACHE_PATH
+        self.cache_history_path = SKINS_HISTORY_CACHE_PATH
         self.api_calls = collections.deque(maxlen=8)  # <-- Přesuň SEM!
-        self.skins = self.load_skins()
+        self._api_lock = threading.Lock()
+        self.session = requests.Session()
+        self.session.headers.update({"Accept-Encoding": "br", "Accept": "application/json", "Connection": "keep-alive"})
+        self._skins_hash = None
+        self._indexed_mtime = None
+        self._history_hash = None
+        self._history_indexed_mtime = None
+        self.index = None
+        self.load_skins()
         self.skins_history_data = self.skins_history()
 
     def start_auto_refresh(self, interval=120):
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="skins-refresh")
+
         def refresh_loop():
             while True:
                 try:
-                    self.skins = self.load_skins()
-                    self.skins_history_data = self.skins_history()
+                    # Both downloads are I/O bound, run them side by side
+                    skins_future = executor.submit(self.load_skins)
+                    history_future = executor.submit(self.skins_history)
+                    skins_future.result()
+                    self.skins_history_data = history_future.result()
                 except Exception as e:
-                    print(f"Error updating skins: {e}")
+                    logger.error("Error updating skins: %s", e)
 
                 time.sleep(interval)
 
         threading.Thread(target=refresh_loop, daemon=True).start()
 
     def load_skins(self):
-        cached_skins = self.cache.get("skins_data")
+        """
+        Load skins from cache or the Skinport API and publish them as ``self.index``.
+        The skins list itself is not kept, the index holds everything the bot reads.
+        """
+        mtime = _cache_mtime(self.cache_path)
+        if mtime is not None and mtime == self._indexed_mtime and time.time() - mtime < CACHE_TTL:
+            # This exact cache file is already loaded and indexed
+            return
+        cached_skins = _read_cache(self.cache_path, CACHE_TTL)
         if cached_skins:
-            print("✅ Loaded skins from cache.")
-            return cached_skins
+            logger.info("✅ Loaded skins from cache.")
+            self._build_index(cached_skins)
+            self._indexed_mtime = mtime
+            return
         self._wait_for_rate_limit()
-        print("🔄 Downloading skins from Skinport API...")
+        logger.info("🔄 Downloading skins from Skinport API...")
         params = {"app_id": 730, "currency": "EUR"}
         url = "https://api.skinport.com/v1/items"
-        response = requests.get(url, params=params, headers={"Accept-Encoding": "br", "Accept": "application/json"})
-        skins = response.json()
-        self.cache.set("skins_data", skins, expire=300)
-        self.api_calls.append(time.time())
-        print(f"Downloaded {len(skins)} skins.")
-        return skins
+        response = self.session.get(url, params=params)
+        content_hash = hashlib.blake2b(response.content, digest_size=16).digest()
+        if content_hash == self._skins_hash:
+            logger.info("Skins unchanged since last download.")
+            _touch_cache(self.cache_path)
+            self._indexed_mtime = _cache_mtime(self.cache_path)
+            return
+        # Keep only the fields the bot uses, the API sends many more per item
+        skins = [
+            {"market_hash_name": s["market_hash_name"], "item_page": s["item_page"], "min_price": s.get("min_price")}
+            for s in orjson.loads(response.content)
+        ]
+        _write_cache(self.cache_path, skins)
+        self._skins_hash = content_hash
+        logger.info("Downloaded %d skins.", len(skins))
+        self._build_index(skins)
+        self._indexed_mtime = _cache_mtime(self.cache_path)
+
+    def _build_index(self, skins):
+        """
+        Build lookup structures for the given skins list and publish them at once.
+        Name-derived structures are carried over from the current snapshot when the names match.
+
+        Args:
+            skins (list): List of skin dicts.
+        """
+        self.index = SkinIndex(skins, self.index)
 
     def skins_history(self):
-        cached_skins = self.cache_history.get("skins_history_data")
+        mtime = _cache_mtime(self.cache_history_path)
+        if mtime is not None and mtime == self._history_indexed_mtime and time.time() - mtime < CACHE_TTL:
+            # This exact cache file is already loaded and indexed
+            return self.skins_history_data
+        cached_skins = _read_cache(self.cache_history_path, CACHE_TTL)
         if cached_skins:
-            print("✅ Loaded skins from cache.")
+            logger.info("✅ Loaded skins from cache.")
+            self.history_by_name = {item["market_hash_name"]: item for item in cached_skins}
+            self._history_indexed_mtime = mtime
             return cached_skins
         self._wait_for_rate_limit()
-        print("🔄 Downloading skins from Skinport API...")
+        logger.info("🔄 Downloading skins from Skinport API...")
         params = {"app_id": 730, "currency": "EUR"}
         url = "https://api.skinport.com/v1/sales/history"
-        response = requests.get(url, params=params, headers={"Accept-Encoding": "br", "Accept": "application/json"})
-        skins = response.json()
-        self.cache_history.set("skins_history_data", skins, expire=300)
-        self.api_calls.append(time.time())
-        print(f"Downloaded {len(skins)} history skins.")
+        response = self.session.get(url, params=params)
+        content_hash = hashlib.blake2b(response.content, digest_size=16).digest()
+        if content_hash == self._history_hash:
+            logger.info("History skins unchanged since last download.")
+            _touch_cache(self.cache_history_path)
+            self._history_indexed_mtime = _cache_mtime(self.cache_history_path)
+            return self.skins_history_data
+        skins = orjson.loads(response.content)
+        _write_cache(self.cache_history_path, skins)
+        self._history_hash = content_hash
+        self.history_by_name = {item["market_hash_name"]: item for item in skins}
+        self._history_indexed_mtime = _cache_mtime(self.cache_history_path)
+        logger.info("Downloaded %d history skins.", len(skins))
         return skins
 
 
-    def find(self, query):
+    def find(self, query, limit=None):
         """
         Find skins by name substring.
 
         Args:
             query (str): Substring to search for in skin names.
+            limit (int, optional): Maximum number of skins to return, at most FIND_RESULTS_LIMIT.
 
         Returns:
             list: List of matching skin dicts.
         """
-        return [s for s in self.skins if query.lower() in s["market_hash_name"].lower()]
+        index = self.index
+        idxs, _ = index.find_indices(query)
+        return [index.skin(i) for i in itertools.islice(idxs, limit)]
+
+    def find_exact(self, name):
+        """
+        Find a skin by its exact market hash name.
+
+        Args:
+            name (str): Skin market hash name.
+
+        Returns:
+            dict or None: Skin dict or None if not found.
+        """
+        index = self.index
+        idx = index.by_name.get(name)
+        return None if idx is None else index.skin(idx)
+
+    def find_history(self, name):
+        """
+        Find sales history of a skin by its exact market hash name.
+
+        Args:
+            name (str): Skin market hash name.
+
+        Returns:
+            dict or None: History dict or None if not found.
+        """
+        return self.history_by_name.get(name)
 
     def _wait_for_rate_limit(self):
-        now = time.time()
-        if len(self.api_calls) < 8:
-            return
-        # Pokud už bylo 8 dotazů, čekej, dokud nejstarší není starší než 5 minut
-        oldest = self.api_calls[0]
-        wait_time = 300 - (now - oldest)
-        if wait_time > 0:
-            print(f"Rate limit reached, waiting {wait_time:.1f} seconds...")
+        # Reserves the call slot under the lock, so parallel downloads cannot both take the last one
+        while True:
+            with self._api_lock:
+                now = time.time()
+                # Pokud už bylo 8 dotazů, čekej, dokud nejstarší není starší než 5 minut
+                wait_time = 300 - (now - self.api_calls[0]) if len(self.api_calls) == 8 else 0
+                if wait_time <= 0:
+                    self.api_calls.append(now)
+                    return
+            logger.warning("Rate limit reached, waiting %.1f seconds...", wait_time)
             time.sleep(wait_time)
 
+# ---------- Formatting ----------
+_STATS_TMPL = (
+    "{period}:\n"
+    "  Min: {min} EUR\n"
+    "  Max: {max} EUR\n"
+    "  Avg: {avg} EUR\n"
+    "  Median: {median} EUR\n"
+    "  Volume: {volume}\n"
+)
+
+
+class _DefaultDict(dict):
+    """
+    Mapping for str.format_map that renders missing keys as 'N/A'.
+    """
+    def __missing__(self, key):
+        return "N/A"
+
+
+def _stats_text(period, stats):
+    """
+    Render one period of a skin's sales history.
+
+    Args:
+        period (str): Period label.
+        stats (dict): Stats for the period from the Skinport sales history.
+
+    Returns:
+        str: Formatted stats block.
+    """
+    return _STATS_TMPL.format_map(_DefaultDict(stats, period=period))
+
+# ---------- SessionCache ----------
+class SessionCache(cachetools.TTLCache):
+    """
+    TTL cache for per-user conversation state that is safe to share between handler threads.
+    TTLCache reorders its expiry list even on reads, so every access takes the lock.
+    """
+    def __init__(self, maxsize, ttl):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.RLock()
+
+    def __getitem__(self, key):
+        with self._lock:
+            return super().__getitem__(key)
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        with self._lock:
+            super().__delitem__(key)
+
+    def __contains__(self, key):
+        with self._lock:
+            return super().__contains__(key)
+
+    def get(self, key, default=None):
+        with self._lock:
+            return super().get(key, default)
+
+    def pop(self, key, *args):
+        with self._lock:
+            return super().pop(key, *args)
+
 # ---------- WatchBot ----------
 class WatchBot:
     """
     Main class for the Telegram bot logic and handlers.
     """
+    _HISTORY_PERIODS = (
+        ("Last 24 hours", "last_24_hours"),
+        ("Last 7 days", "last_7_days"),
+        ("Last 30 days", "last_30_days"),
+        ("Last 90 days", "last_90_days"),
+    )
+
     def __init__(self, api_token, db_path, skins):
         """
         Initialize the bot, register handlers, and prepare DB access.
@@ -299,25 +758,26 @@ class WatchBot:
             db_path (str): Path to SQLite database.
             skins (Skins): Instance of Skins class.
         """
-        self.bot = telebot.TeleBot(token=api_token)
+        self.bot = telebot.TeleBot(token=api_token, threaded=True, num_threads=BOT_THREADS)
 
 
-        self.started_users = set()
+        self._started_mutable = set()
+        self._started_lock = threading.Lock()
+        self.started_users = frozenset()
         self.skins = skins
-        self.db_insert = Insert(db_path)
-        self.db_update = Update(db_path)
-        self.db_select = Select(db_path)
-        self.db_delete = Delete(db_path)
-        self.db_insert_reminder = InsertReminder(db_path)
-        self.db_select_reminder = SelectReminder(db_path)
-        self.db_delete_reminder = DeleteReminder(db_path)
-        self.db_update_reminder = UpdateReminder(db_path)
+        self.db = Db(db_path)
         self.running_reminders = {}
-        self.user_remindskin_matches = {}
-        self.user_skin_history_matches = {}
-
-        self.user_watch_data = {}
+        self._reminder_heap = []
+        self._reminder_cond = threading.Condition()
+        self.user_remindskin_matches = SessionCache(maxsize=SESSION_CACHE_SIZE, ttl=SESSION_TTL)
+        self.user_skin_history_matches = SessionCache(maxsize=SESSION_CACHE_SIZE, ttl=SESSION_TTL)
+
+        self.user_watch_data = SessionCache(maxsize=SESSION_CACHE_SIZE, ttl=SESSION_TTL)
+        self.active_watches = {}
+        self.start_reminder_scheduler()
         self.start_reminders()
+        self.start_watches()
+        self.start_watch_scheduler()
 
         # Register handlers
         self.bot.message_handler(commands=["start"])(self.welcome)
@@ -330,15 +790,30 @@ class WatchBot:
         self.bot.message_handler(commands=["myreminders"])(self.require_start(self.list_user_reminders))
 
         #self.bot.message_handler(commands=["saleshistory"])(self.require_start(self.sales_history))
-        self.bot.callback_query_handler(func=lambda call: call.data.startswith("select_skin_"))(self.callback_select_skin)
-        self.bot.callback_query_handler(func=lambda call: call.data.startswith("select_watch_skin_"))(self.callback_watch_selected)
-        self.bot.callback_query_handler(func=lambda call: call.data.startswith("delete_watch_"))(self.callback_delete_watch)
-        self.bot.callback_query_handler(func=lambda call: call.data.startswith("change_watch_"))(self.callback_change_watch)
-        self.bot.callback_query_handler(func=lambda call: call.data.startswith("history_skin_"))(self.callback_history_skin)
-        self.bot.callback_query_handler(func=lambda call: call.data.startswith("remindskin_select_"))(self.remindskin_inline_selected)
-        self.bot.callback_query_handler(func=lambda call: call.data.startswith("select_reminder_"))(self.callback_reminder_selected)
-        self.bot.callback_query_handler(func=lambda call: call.data.startswith("delete_reminder_"))(self.callback_delete_reminder)
-        self.bot.callback_query_handler(func=lambda call: call.data.startswith("change_reminder_"))(self.callback_change_reminder)
+        self._cb_table = {
+            "select_skin": self.callback_select_skin,
+            "select_watch_skin": self.callback_watch_selected,
+            "delete_watch": self.callback_delete_watch,
+            "change_watch": self.callback_change_watch,
+            "history_skin": self.callback_history_skin,
+            "remindskin_select": self.remindskin_inline_selected,
+            "select_reminder": self.callback_reminder_selected,
+            "delete_reminder": self.callback_delete_reminder,
+            "change_reminder": self.callback_change_reminder,
+        }
+        self.bot.callback_query_handler(func=lambda call: True)(self._dispatch_callback)
+
+    def _dispatch_callback(self, call):
+        """
+        Route a callback query to its handler by the prefix before the trailing ID.
+
+        Args:
+            call (telebot.types.CallbackQuery): Callback query object.
+        """
+        prefix, _, _ = call.data.rpartition("_")
+        handler = self._cb_table.get(prefix)
+        if handler:
+            handler(call)
 
     def require_start(self, func):
         """
@@ -367,8 +842,9 @@ class WatchBot:
         Args:
             message (telebot.types.Message): Telegram message object.
         """
-        self.started_users.add(message.chat.id)
-        self.start_watch_user_data(message.chat.id)
+        with self._started_lock:
+            self._started_mutable.add(message.chat.id)
+            self.started_users = frozenset(self._started_mutable)
         self.bot.send_message(message.chat.id, f"Welcome {message.from_user.first_name}! Use /watchskin to start watching a skin.")
 
     def check_exit(self, message):
@@ -386,51 +862,88 @@ class WatchBot:
         return wrapper
 
 
-    def start_watch_user_data(self, chat_id):
+    def start_watches(self):
         """
-        Start watch threads for all user's watches.
-
-        Args:
-            chat_id (int): Telegram chat ID.
+        Register all stored watches with the watch scheduler using a single query.
         """
-        watch_list = self.db_select.get_user_watches(chat_id)
-        for watch in watch_list:
-            skin = self.skins.find(watch["skin_market_hash_name"])
-            if skin:
-                threading.Thread(
-                    target=self.watch_price_loop,
-                    args=(chat_id, skin[0], watch["target_price"], watch["condition"], watch["id"]),
-                    daemon=True
-                ).start()
+        for watch in self.db.get_all_watches():
+            self.register_watch(watch["id"], watch["chat_id"], watch["skin_market_hash_name"],
+                                watch["target_price"], watch["condition"])
 
-    def watch_price_loop(self, chat_id, skin, target_price, condition, watch_id):
+    def register_watch(self, watch_id, chat_id, market_hash_name, target_price, condition):
         """
-        Thread function that checks the price of a skin and notifies the user if the target price is met.
+        Add (or replace) a watch checked by the watch scheduler.
 
         Args:
+            watch_id (int): Watch ID in DB.
             chat_id (int): Telegram chat ID.
-            skin (dict): Skin data.
+            market_hash_name (str): Skin name.
             target_price (float): Target price.
             condition (str): '<' or '>'.
+        """
+        self.active_watches[watch_id] = (chat_id, market_hash_name, target_price, condition)
+
+    def unregister_watch(self, watch_id):
+        """
+        Stop checking a watch.
+
+        Args:
             watch_id (int): Watch ID in DB.
         """
+        self.active_watches.pop(watch_id, None)
+
+    def start_watch_scheduler(self, interval=60):
+        """
+        Start the single background thread that checks all active watches.
+
+        Args:
+            interval (int): Seconds between checks.
+        """
+        threading.Thread(target=self.watch_price_loop, args=(interval,), daemon=True).start()
+
+    def watch_price_loop(self, interval=60):
+        """
+        Thread function that checks the price of every active watch and notifies the user if the target price is met.
+
+        Args:
+            interval (int): Seconds between checks.
+        """
         while True:
             try:
-                current_price = skin['min_price']
-                name = skin['market_hash_name']
-                url = skin['item_page']
-                if condition == '<' and current_price <= target_price:
-                    self.bot.send_message(chat_id, f"✅ {name} is now {current_price} EUR (below {target_price} EUR)")
-                    self.db_delete.delete_watch(watch_id)
-                    return
-                elif condition == '>' and current_price >= target_price:
-                    self.bot.send_message(chat_id, f"✅ {name} is now {current_price} EUR (above {target_price} EUR)")
-                    self.db_delete.delete_watch(watch_id)
-                    return
-                time.sleep(60)
+                fired = self.fired_watches()
             except Exception as e:
-                print(f"Error: {e}")
-                time.sleep(60)
+                logger.error("Error: %s", e)
+                fired = []
+            for watch_id, chat_id, name, target_price, condition, current_price in fired:
+                try:
+                    direction = "below" if condition == '<' else "above"
+                    self.bot.send_message(chat_id, f"✅ {name} is now {current_price} EUR ({direction} {target_price} EUR)")
+                    self.db.delete_watch(watch_id)
+                    self.unregister_watch(watch_id)
+                except Exception as e:
+                    logger.error("Error: %s", e)
+            time.sleep(interval)
+
+    def fired_watches(self):
+        """
+        Evaluate all active watches against the current prices in one pass.
+
+        Returns:
+            list: Tuples (watch_id, chat_id, name, target_price, condition, current_price) of watches whose target is met.
+        """
+        # Resolve prices every tick so refreshed data is seen; NaN (no listing) never compares true
+        index = self.skins.index
+        by_name = index.by_name
+        prices = index.prices
+        fired = []
+        for watch_id, (chat_id, name, target_price, condition) in list(self.active_watches.items()):
+            idx = by_name.get(name)
+            if idx is None:
+                continue
+            current_price = prices[idx]
+            if WATCH_CONDITIONS[condition](current_price, target_price):
+                fired.append((watch_id, chat_id, name, target_price, condition, current_price))
+        return fired
 
     def list_user_watches(self, message):
         """
@@ -439,7 +952,7 @@ class WatchBot:
         Args:
             message (telebot.types.Message): Telegram message object.
         """
-        watches = self.db_select.get_user_watches(message.chat.id)
+        watches = self.db.get_user_watches(message.chat.id)
         if not watches:
             self.bot.send_message(message.chat.id, "You are not watching any skins.")
         else:
@@ -471,24 +984,24 @@ class WatchBot:
         """
 
 
-        matches = self.skins.find(message.text)
-        if not matches:
+        index = self.skins.index
+        idxs, total = index.find_indices(message.text)
+        if not idxs:
             self.bot.send_message(message.chat.id, "No skins found. Please try again or type 'exit' to cancel.")
             self.bot.register_next_step_handler(message, self.find_skin_reply)
             return
 
-        skins_text = ""
-        for skin in matches:
-            name = escape(skin["market_hash_name"])
-            url = skin["item_page"]
-            min_price = skin.get('min_price')
+        parts = []
+        for i in idxs:
+            min_price = index.price_at(i)
             price = f"{min_price:.2f}" if min_price is not None else "N/A"
-            skins_text += f'<a href="{url}">{name}</a> - {price} EUR\n'
+            parts.append(f'<a href="{index.urls[i]}">{index.names_escaped[i]}</a> - {price} EUR')
+        skins_text = "\n".join(parts)
 
-        try:
-            self.bot.send_message(message.chat.id, f"Skins found:\n{skins_text}", parse_mode="HTML")
-        except Exception:
-            self.bot.send_message(message.chat.id, "Too many results, please be more specific.")
+        self.bot.send_message(message.chat.id, f"Skins found:\n{skins_text}", parse_mode="HTML")
+        if total > len(idxs):
+            self.bot.send_message(message.chat.id,
+                                  f"… {total - len(idxs)} more, please be more specific or type 'exit' to cancel.")
             self.bot.register_next_step_handler(message, self.find_skin_reply)
 
     @exit_guard
@@ -513,7 +1026,7 @@ class WatchBot:
         skin_name = message.text.strip().lower()
 
 
-        matches = self.skins.find(message.text)
+        matches, hint = self.find_for_keyboard(message.text)
         if not matches:
             self.bot.send_message(message.chat.id, "Skin not found, please try again or type 'exit' to cancel.")
             self.bot.register_next_step_handler(message, self.ask_price_target)
@@ -532,10 +1045,25 @@ class WatchBot:
             keyboard = self.create_skins_keyboard(matches)
             self.bot.send_message(
                 message.chat.id,
-                "Multiple skins found, please select one:",
+                f"Multiple skins found, please select one:{hint}",
                 reply_markup=keyboard
             )
 
+    def find_for_keyboard(self, query):
+        """
+        Find skins for a selection keyboard, capped at SKINS_KEYBOARD_LIMIT buttons.
+
+        Args:
+            query (str): Substring to search for in skin names.
+
+        Returns:
+            tuple: (list of skin dicts, hint text to append to the prompt or "").
+        """
+        matches = self.skins.find(query, limit=SKINS_KEYBOARD_LIMIT + 1)
+        if len(matches) > SKINS_KEYBOARD_LIMIT:
+            return matches[:SKINS_KEYBOARD_LIMIT], f"\n(Only the first {SKINS_KEYBOARD_LIMIT} are shown, type a more specific name to see others.)"
+        return matches, ""
+
     def create_skins_keyboard(self, matches):
         """
         Create an inline keyboard for selecting skins.
@@ -599,13 +1127,8 @@ class WatchBot:
                 self.bot.send_message(chat_id, "Session expired, please start again.")
                 return
 
-            watch_id = self.db_insert.add_watch(chat_id, skin["market_hash_name"], skin["item_page"], price, condition)
-            thread = threading.Thread(
-                target=self.watch_price_loop,
-                args=(chat_id, skin, price, condition, watch_id),
-                daemon=True
-            )
-            thread.start()
+            watch_id = self.db.add_watch(chat_id, skin["market_hash_name"], skin["item_page"], price, condition)
+            self.register_watch(watch_id, chat_id, skin["market_hash_name"], price, condition)
             self.bot.send_message(
                 chat_id,
                 f"Started watching '{skin['market_hash_name']}' for target price: {condition}{price} EUR"
@@ -624,7 +1147,7 @@ class WatchBot:
         """
         chat_id = call.message.chat.id
         watch_id = int(call.data.split("_")[-1])
-        watch = self.db_select.get_watch(watch_id, chat_id)
+        watch = self.db.get_watch(watch_id, chat_id)
         if not watch:
             self.bot.answer_callback_query(call.id, "Watch not found or does not belong to you.")
             return
@@ -647,7 +1170,8 @@ class WatchBot:
             call (telebot.types.CallbackQuery): Callback query object.
         """
         watch_id = int(call.data.split("_")[-1])
-        self.db_delete.delete_watch(watch_id)
+        self.db.delete_watch(watch_id)
+        self.unregister_watch(watch_id)
         self.bot.edit_message_text(chat_id=call.message.chat.id, message_id=call.message.message_id, text="🗑️ Watch has been deleted.")
 
 
@@ -692,24 +1216,14 @@ class WatchBot:
         if not watch_id:
             self.bot.send_message(chat_id, "⚠️ Session expired, please try again.")
             return
-        self.db_update.update_watch(watch_id, target_price, condition)
-        watch = self.db_select.get_watch(watch_id, chat_id)
+        self.db.update_watch(watch_id, target_price, condition)
+        watch = self.db.get_watch(watch_id, chat_id)
         if not watch:
             self.bot.send_message(chat_id, "⚠️ Watch not found after update.")
             return
-        skins_found = self.skins.find(watch["skin_market_hash_name"])
-        if not skins_found:
-            self.bot.send_message(chat_id, "⚠️ Skin data not found, cannot start watching.")
-            return
-        skin = skins_found[0]
-        thread = threading.Thread(
-            target=self.watch_price_loop,
-            args=(chat_id, skin, target_price, condition, watch_id),
-            daemon=True
-        )
-        thread.start()
+        self.register_watch(watch_id, chat_id, watch["skin_market_hash_name"], target_price, condition)
         self.bot.send_message(chat_id, f"✅ Target price updated to: {condition}{target_price} EUR")
-        del self.user_watch_data[chat_id]
+        self.user_watch_data.pop(chat_id, None)
 
     @exit_guard
     def ask_skin_history(self, message):
@@ -719,7 +1233,7 @@ class WatchBot:
 
     @exit_guard
     def ask_skin_history_reply(self, message):
-        matches = self.skins.find(message.text)
+        matches, hint = self.find_for_keyboard(message.text)
 
         if not matches:
             self.bot.send_message(message.chat.id, "Skin not found, please try again.")
@@ -736,11 +1250,11 @@ class WatchBot:
             keyboard.add(InlineKeyboardButton(text=label, callback_data=callback_data))
 
         try:
-            self.bot.send_message(message.chat.id, "Select skin:", reply_markup=keyboard)
+            self.bot.send_message(message.chat.id, f"Select skin:{hint}", reply_markup=keyboard)
         except Exception as e:
             self.bot.send_message(message.chat.id, "Too many results please try again.")
             self.bot.register_next_step_handler(message, self.ask_skin_history_reply)
-            print(e)
+            logger.error("Error sending history selection: %s", e)
 
     def callback_history_skin(self, call):
         chat_id = call.message.chat.id
@@ -753,8 +1267,7 @@ class WatchBot:
 
         skin = matches[idx]
         skin_name = skin["market_hash_name"]
-        history_data = next((item for item in self.skins.skins_history_data if item["market_hash_name"] == skin_name),
-                            None)
+        history_data = self.skins.find_history(skin_name)
 
         if not history_data:
             self.bot.send_message(chat_id, "No historical data available for this skin.")
@@ -764,21 +1277,9 @@ class WatchBot:
         skin_name_html = escape(skin_name)
         skin_link = f'<a href="{market_url}">{skin_name_html}</a>'
 
-        def stats_text(period, stats):
-            return (
-                f"{period}:\n"
-                f"  Min: {stats.get('min', 'N/A')} EUR\n"
-                f"  Max: {stats.get('max', 'N/A')} EUR\n"
-                f"  Avg: {stats.get('avg', 'N/A')} EUR\n"
-                f"  Median: {stats.get('median', 'N/A')} EUR\n"
-                f"  Volume: {stats.get('volume', 'N/A')}\n"
-            )
-
-        text = f"📊 Price stats for {skin_link}:\n\n"
-        text += stats_text("Last 24 hours", history_data.get("last_24_hours", {}))
-        text += stats_text("\nLast 7 days", history_data.get("last_7_days", {}))
-        text += stats_text("\nLast 30 days", history_data.get("last_30_days", {}))
-        text += stats_text("\nLast 90 days", history_data.get("last_90_days", {}))
+        parts = [f"📊 Price stats for {skin_link}:\n"]
+        parts.extend(_stats_text(label, history_data.get(key, {})) for label, key in self._HISTORY_PERIODS)
+        text = "\n".join(parts)
 
         self.bot.edit_message_text(chat_id=chat_id, message_id=call.message.message_id, text=text, parse_mode="HTML")
 
@@ -793,8 +1294,9 @@ class WatchBot:
 
     def remindskin_choose_skin(self, message):
         query = message.text.strip()
-        matches = self.skins.find(query)
-        print(f"DEBUG: User query: {query}, found matches: {[s['market_hash_name'] for s in matches]}")
+        matches, hint = self.find_for_keyboard(query)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("User query: %s, found matches: %s", query, [s['market_hash_name'] for s in matches])
         if not matches:
             self.bot.send_message(
                 message.chat.id,
@@ -811,13 +1313,12 @@ class WatchBot:
         self.user_remindskin_matches[message.chat.id] = matches
         self.bot.send_message(
             message.chat.id,
-            "Choose the skin you want to be reminded about:",
+            f"Choose the skin you want to be reminded about:{hint}",
             reply_markup=inline_kb
         )
 
     @exit_guard
     def remindskin_set_interval(self, message, matches):
-        print ("interval")
         skin_name = message.text.strip()
         skin = next((s for s in matches if s["market_hash_name"] == skin_name), None)
         if not skin:
@@ -840,18 +1341,9 @@ class WatchBot:
                 self.bot.send_message(message.chat.id, "Something went wrong. Please try /remindskin again.")
                 return
 
-        text = message.text.strip().lower()
-        interval_min = None
-        if "hour" in text:
-            num = ''.join([c for c in text if c.isdigit()])
-            interval_min = int(num) * 60 if num else 60
-        elif "day" in text:
-            num = ''.join([c for c in text if c.isdigit()])
-            interval_min = int(num) * 24 * 60 if num else 24 * 60
-        elif "min" in text:
-            num = ''.join([c for c in text if c.isdigit()])
-            interval_min = int(num) if num else 1
-        else:
+        try:
+            interval_min = self.parse_interval(message.text.strip())
+        except ValueError:
             self.bot.send_message(
                 message.chat.id,
                 "Invalid interval. Please enter something like '30 minutes', '2 hours', or '1 day'."
@@ -859,21 +1351,14 @@ class WatchBot:
             self.bot.register_next_step_handler(message, self.remindskin_save, skin)
             return
 
-        rid = self.db_insert_reminder.add_reminder(
+        rid = self.db.add_reminder(
             message.chat.id,
             skin["market_hash_name"],
             skin["item_page"],
             interval_min
         )
 
-        stop_event = threading.Event()
-        self.running_reminders[rid] = stop_event
-
-        threading.Thread(
-            target=self.reminder_loop,
-            args=(message.chat.id, skin, interval_min, rid, stop_event),
-            daemon=True
-        ).start()
+        self.schedule_reminder(rid, message.chat.id, skin, interval_min)
 
         self.bot.send_message(
             message.chat.id,
@@ -882,38 +1367,96 @@ class WatchBot:
             parse_mode="HTML"
         )
 
-    def reminder_loop(self, chat_id, skin, interval_min, reminder_id, stop_event):
-        print(f"🔁 Starting reminder loop for {reminder_id} (every {interval_min} min)")
-        while not stop_event.is_set():
+    def start_reminder_scheduler(self):
+        """
+        Start the single background thread that sends all reminders.
+        """
+        threading.Thread(target=self.reminder_loop, daemon=True).start()
+
+    def schedule_reminder(self, reminder_id, chat_id, skin, interval_min):
+        """
+        Add (or replace) a reminder; the first message is sent right away.
+
+        Args:
+            reminder_id (int): Reminder ID in DB.
+            chat_id (int): Telegram chat ID.
+            skin (dict): Skin data.
+            interval_min (int): Interval in minutes.
+        """
+        fire_at = time.monotonic()
+        # The link never changes, render it once instead of on every fire
+        link = f"<a href=\"{skin['item_page']}\">{escape(skin['market_hash_name'])}</a>"
+        with self._reminder_cond:
+            self.running_reminders[reminder_id] = (chat_id, link, interval_min, fire_at)
+            heapq.heappush(self._reminder_heap, (fire_at, reminder_id))
+            self._reminder_cond.notify()
+
+    def cancel_reminder(self, reminder_id):
+        """
+        Stop sending a reminder.
+
+        Args:
+            reminder_id (int): Reminder ID in DB.
+
+        Returns:
+            bool: True if the reminder was running.
+        """
+        with self._reminder_cond:
+            # The heap entry is left behind and skipped when it comes due
+            return self.running_reminders.pop(reminder_id, None) is not None
+
+    def _next_due_reminder(self):
+        """
+        Block until a reminder is due and reschedule it for its next interval.
+
+        Returns:
+            tuple: (reminder_id, chat_id, link, interval_min) of the due reminder.
+        """
+        with self._reminder_cond:
+            while True:
+                if not self._reminder_heap:
+                    self._reminder_cond.wait()
+                    continue
+                fire_at, reminder_id = self._reminder_heap[0]
+                delay = fire_at - time.monotonic()
+                if delay > 0:
+                    self._reminder_cond.wait(timeout=delay)
+                    continue
+                heapq.heappop(self._reminder_heap)
+                entry = self.running_reminders.get(reminder_id)
+                if entry is None or entry[3] != fire_at:
+                    # Cancelled or rescheduled since this entry was pushed
+                    continue
+                chat_id, link, interval_min, _ = entry
+                next_fire = time.monotonic() + interval_min * 60
+                self.running_reminders[reminder_id] = (chat_id, link, interval_min, next_fire)
+                heapq.heappush(self._reminder_heap, (next_fire, reminder_id))
+                return reminder_id, chat_id, link, interval_min
+
+    def reminder_loop(self):
+        """
+        Thread function that sends every reminder when it comes due.
+        """
+        while True:
+            reminder_id, chat_id, link, interval_min = self._next_due_reminder()
             try:
-                self.bot.send_message(
-                    chat_id,
-                    f"⏰ Reminder for skin:\n<a href='{skin['item_page']}'>{escape(skin['market_hash_name'])}</a>",
-                    parse_mode="HTML"
-                )
-                for _ in range(interval_min * 60):
-                    if stop_event.is_set():
-                        print(f"🛑 Reminder loop for {reminder_id} received stop signal.")
-                        return
-                    time.sleep(1)
+                self.bot.send_message(chat_id, f"⏰ Reminder for skin:\n{link}", parse_mode="HTML")
             except Exception as e:
-                print(f"Reminder error for {reminder_id}: {e}")
-                time.sleep(60)
+                logger.error("Reminder error for %s: %s", reminder_id, e)
 
     def start_reminders(self):
-        self.running_reminders = {}
-        reminders = self.db_select_reminder.get_all_reminders()
-        for rem in reminders:
-            skin = next((s for s in self.skins.skins if s["market_hash_name"] == rem["skin_market_hash_name"]), None)
-            if skin:
-                stop_event = threading.Event()
-                self.running_reminders[rem["id"]] = stop_event  # ✅ Kritické!
-                threading.Thread(
-                    target=self.reminder_loop,
-                    args=(rem["chat_id"], skin, rem["interval_minutes"], rem["id"], stop_event),
-                    daemon=True
-                ).start()
-                print(f"🔁 Loaded reminder loop for {rem['id']} (every {rem['interval_minutes']} min)")
+        reminders = self.db.get_all_reminders()
+        # Resolve every reminder's skin in one pass before any is scheduled
+        index = self.skins.index
+        by_name = index.by_name
+        resolved = [
+            (rem, index.skin(by_name[rem["skin_market_hash_name"]]))
+            for rem in reminders
+            if rem["skin_market_hash_name"] in by_name
+        ]
+        for rem, skin in resolved:
+            self.schedule_reminder(rem["id"], rem["chat_id"], skin, rem["interval_minutes"])
+            logger.debug("🔁 Loaded reminder %s (every %s min)", rem['id'], rem['interval_minutes'])
 
 
     def remindskin_inline_selected(self, call):
@@ -942,21 +1485,14 @@ class WatchBot:
         interval_str = message.text.strip()
         try:
             interval_minutes = self.parse_interval(interval_str)
-            rid = self.db_insert_reminder.add_reminder(
+            rid = self.db.add_reminder(
                 message.chat.id,
                 skin["market_hash_name"],
                 skin["item_page"],
                 interval_minutes
             )
 
-            stop_event = threading.Event()
-            self.running_reminders[rid] = stop_event
-
-            threading.Thread(
-                target=self.reminder_loop,
-                args=(message.chat.id, skin, interval_minutes, rid, stop_event),
-                daemon=True
-            ).start()
+            self.schedule_reminder(rid, message.chat.id, skin, interval_minutes)
 
             self.bot.send_message(
                 message.chat.id,
@@ -967,9 +1503,7 @@ class WatchBot:
 
     def parse_interval(self, interval_str):
         # Jednoduchý parser pro "30 minutes", "2 hours", "1 day"
-        import re
-        interval_str = interval_str.lower()
-        match = re.match(r"(\d+)\s*(minute|min|hour|day)s?", interval_str)
+        match = _INTERVAL_RE.match(interval_str.lower())
         if not match:
             raise ValueError("Invalid interval format. Use e.g. '30 minutes', '2 hours', '1 day'")
         value, unit = int(match.group(1)), match.group(2)
@@ -983,7 +1517,7 @@ class WatchBot:
             raise ValueError("Unknown time unit.")
 
     def list_user_reminders(self, message):
-        reminders = self.db_select_reminder.get_user_reminders(message.chat.id)
+        reminders = self.db.get_user_reminders(message.chat.id)
         if not reminders:
             self.bot.send_message(message.chat.id, "You have no reminders set.")
         else:
@@ -997,8 +1531,7 @@ class WatchBot:
     def callback_reminder_selected(self, call):
         chat_id = call.message.chat.id
         reminder_id = int(call.data.split("_")[-1])
-        reminders = self.db_select_reminder.get_user_reminders(chat_id)
-        reminder = next((r for r in reminders if r['id'] == reminder_id), None)
+        reminder = self.db.get_reminder_by_id(reminder_id, chat_id)
         if not reminder:
             self.bot.answer_callback_query(call.id, "Reminder not found.")
             return
@@ -1015,10 +1548,8 @@ class WatchBot:
 
     def callback_delete_reminder(self, call):
         reminder_id = int(call.data.split("_")[-1])
-        stop_event = self.running_reminders.pop(reminder_id, None)
-        if stop_event:
-            stop_event.set()
-        self.db_delete_reminder.delete_reminder(reminder_id)
+        self.cancel_reminder(reminder_id)
+        self.db.delete_reminder(reminder_id)
         self.bot.edit_message_text(chat_id=call.message.chat.id, message_id=call.message.message_id,
                                    text="🗑️ Reminder has been deleted.")
 
@@ -1044,37 +1575,22 @@ class WatchBot:
 
         try:
             new_interval = self.parse_interval(message.text.strip())
-            reminders = self.db_select_reminder.get_user_reminders(chat_id)
-            rem = next((r for r in reminders if r["id"] == reminder_id), None)
+            # ✅ Update interval in DB
+            rem = self.db.update_reminder_if_owned(reminder_id, chat_id, new_interval)
             if not rem:
                 self.bot.send_message(chat_id, "⚠️ Reminder not found.")
                 return
 
-            # ✅ Stop old reminder thread
-            stop_event = self.running_reminders.pop(reminder_id, None)
-            if stop_event:
-                stop_event.set()
-                print(f"🛑 Stopped old reminder thread: {reminder_id}")
-            else:
-                print(f"⚠️ No stop_event found for reminder {reminder_id} in self.running_reminders")
-
-            # ✅ Update interval in DB
-            self.db_update_reminder.update_reminder(reminder_id, new_interval)
-
-            # ✅ Start new reminder thread with updated interval
-            skin = next((s for s in self.skins.skins if s["market_hash_name"] == rem["skin_market_hash_name"]), None)
+            # ✅ Reschedule reminder with updated interval (replaces the old schedule)
+            skin = self.skins.find_exact(rem["skin_market_hash_name"])
             if skin:
-                new_event = threading.Event()
-                self.running_reminders[reminder_id] = new_event
-                threading.Thread(
-                    target=self.reminder_loop,
-                    args=(chat_id, skin, new_interval, reminder_id, new_event),
-                    daemon=True
-                ).start()
-                print(f"✅ Started new reminder thread: {reminder_id}, interval: {new_interval} minutes")
+                self.schedule_reminder(reminder_id, chat_id, skin, new_interval)
+                logger.debug("✅ Rescheduled reminder: %s, interval: %s minutes", reminder_id, new_interval)
+            elif self.cancel_reminder(reminder_id):
+                logger.debug("🛑 Stopped reminder without skin data: %s", reminder_id)
 
             self.bot.send_message(chat_id, f"✅ Interval updated to {new_interval} minutes.")
-            del self.user_watch_data[chat_id]
+            self.user_watch_data.pop(chat_id, None)
 
         except Exception as e:
             self.bot.send_message(chat_id, f"❌ Error: {e}. Please try again.")
@@ -1084,12 +1600,13 @@ class WatchBot:
         """
         Start the bot polling loop.
         """
-        self.bot.infinity_polling()
+        self.bot.infinity_polling(skip_pending=True, timeout=25, long_polling_timeout=50)
 # ---------- Main ----------
 if __name__ == "__main__":
     """
     Main entry point. Loads skins and starts the bot.
     """
+    logging.basicConfig(level=logging.INFO)
     skins = Skins()
     skins.start_auto_refresh(300)
 